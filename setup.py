@@ -1,8 +1,13 @@
 from setuptools import setup, find_packages
 
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
 # Read the requirements from requirements.txt
-with open('requirements.txt') as f:
-    requirements = f.read().splitlines()
+requirements = _read('requirements.txt').splitlines()
 
 setup(
     name="xmlquerybuilder",
@@ -17,7 +22,7 @@ setup(
     author="Hari Ravichandran",
     author_email="hari@live.com",
     description="A tool to build FetchXML queries using a Pandas-like syntax.",
-    long_description=open('README.md').read(),
+    long_description=_read('README.md'),
     long_description_content_type="text/markdown",
     url="https://github.com/hariravichandran/FetchXML-query-builder",
     classifiers=[
@@ -1,25 +1,104 @@
+import sys
+from copy import deepcopy
+from functools import lru_cache
 import xml.etree.ElementTree as ET
-import xml.dom.minidom
+from xml.etree.ElementTree import (
+    Element as _Element, SubElement as _SubElement, fromstring as _fromstring, tostring as _tostring,
+)
+
+_BOOLSTR = ("false", "true")
+
+
+@lru_cache(maxsize=256)
+def _idkey(name):
+    """Return the default join field for an entity, e.g. "contact" -> "contactid"."""
+    return sys.intern(name + "id")
+
+
+if hasattr(ET, "indent"):
+    _indent = ET.indent
+else:
+    def _indent(elem, space="  ", level=0):
+        """
+        Indent an element tree in place, for Pythons without ET.indent (< 3.9).
+
+        Args:
+            elem (Element): The element to indent.
+            space (str, optional): The whitespace used for each indentation level.
+            level (int, optional): The depth of elem in the tree.
+        """
+        pad = "\n" + level * space
+        if len(elem):
+            if not elem.text or not elem.text.strip():
+                elem.text = pad + space
+            for child in elem:
+                _indent(child, space, level + 1)
+            if not child.tail or not child.tail.strip():
+                child.tail = pad
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = pad
 
 class XMLQueryBuilder:
-    def __init__(self, root_entity):
+    __slots__ = ("root_entity_name", "root", "entity", "_filter_root", "_cache")
+
+    def __init__(self, root_entity, root=None):
         """
         Initialize the XMLQueryBuilder with the root entity.
 
         Args:
             root_entity (str): The name of the root entity for the FetchXML query.
+            root (Element, optional): An already parsed <fetch> element to build on
+                instead of a new empty tree. Its <entity> child must be named root_entity.
+
+        Raises:
+            ValueError: If root has no <entity> child, or that entity is not named root_entity.
 
         Example:
             query = XMLQueryBuilder("account")
         """
         self.root_entity_name = root_entity
-        self.root = ET.Element("fetch")
-        self.entity = ET.SubElement(self.root, "entity", {"name": root_entity})
-        self.select_attributes = []
-        self.filters = []
-        self.linked_entities = []
-        self.orders = []
-        self.aggregates = []
+        if root is None:
+            self._init_empty_tree()
+        else:
+            entity = root.find("entity")
+            if entity is None:
+                raise ValueError("root has no <entity> child")
+            if entity.get("name") != root_entity:
+                raise ValueError(f"root entity is {entity.get('name')!r}, expected {root_entity!r}")
+            self.root = root
+            self.entity = entity
+        self._init_state()
+
+    def _init_empty_tree(self):
+        """Create the bare <fetch><entity/></fetch> tree for root_entity_name."""
+        self.root = _Element("fetch")
+        self.entity = _SubElement(self.root, "entity", {"name": self.root_entity_name})
+
+    def _init_state(self):
+        """Reset the state the builder methods keep alongside the tree."""
+        self._filter_root = None
+        self._cache = None
+
+    @property
+    def select_attributes(self):
+        """list of str: Names of the plain (non-aggregate, non-group-by) attributes selected."""
+        return [attr.get("name") for attr in self.entity.iterfind("attribute")
+                if "aggregate" not in attr.attrib and "groupby" not in attr.attrib]
+
+    @property
+    def linked_entities(self):
+        """list of Element: The <link-entity> elements of the root entity."""
+        return self.entity.findall("link-entity")
+
+    @property
+    def orders(self):
+        """list of Element: The <order> elements of the root entity."""
+        return self.entity.findall("order")
+
+    @property
+    def aggregates(self):
+        """list of Element: The aggregate <attribute> elements of the root entity."""
+        return [attr for attr in self.entity.iterfind("attribute") if "aggregate" in attr.attrib]
 
     def select(self, *attributes):
         """
@@ -36,11 +115,30 @@ class XMLQueryBuilder:
             query = XMLQueryBuilder("account").select("name", "accountid")
         """
         if attributes == ('ALL',):
-            ET.SubElement(self.entity, "all-attributes")
-        else:
-            for attr in attributes:
-                ET.SubElement(self.entity, "attribute", {"name": attr})
-                self.select_attributes.extend(attributes)
+            _SubElement(self.entity, "all-attributes")
+            return self
+        return self.select_many(attributes)
+
+    def select_many(self, attributes):
+        """
+        Select attributes from an iterable, such as a list of column names read from metadata.
+
+        Args:
+            attributes (iterable of str): Attributes to select.
+
+        Raises:
+            TypeError: If attributes is a single str rather than an iterable of names.
+
+        Similar to:
+            - Pandas: df[cols]
+            - SQL: SELECT col1, col2 FROM table
+
+        Example:
+            query = XMLQueryBuilder("account").select_many(["name", "accountid"])
+        """
+        if isinstance(attributes, str):
+            raise TypeError("select_many() expects an iterable of attribute names, not a str; use select() for a single attribute")
+        self.entity.extend([_Element("attribute", {"name": attr}) for attr in attributes])
         return self
 
     def link_entity(self, name, alias=None, from_field=None, to_field=None, link_type=None):
@@ -61,14 +159,14 @@ class XMLQueryBuilder:
         Example:
             query = XMLQueryBuilder("account").link_entity("contact", alias="c", from_field="contactid", to_field="primarycontactid")
         """
-        link = ET.SubElement(self.entity, "link-entity", {
+        id_field = None if from_field and to_field else _idkey(name)
+        _SubElement(self.entity, "link-entity", {
             "name": name,
-            "alias": alias if alias else name,
-            "from": from_field if from_field else f"{name}id",
-            "to": to_field if to_field else f"{name}id",
-            "link-type": link_type if link_type else "inner"
+            "alias": alias or name,
+            "from": from_field or id_field,
+            "to": to_field or id_field,
+            "link-type": link_type or "inner"
         })
-        self.linked_entities.append(link)
         return self
 
     def add_filter(self, attribute, operator, value):
@@ -78,7 +176,7 @@ class XMLQueryBuilder:
         Args:
             attribute (str): The attribute to filter on.
             operator (str): The operator for the condition (e.g., eq, gt, lt).
-            value (str): The value to filter by.
+            value (str): The value to filter by. Booleans are written as "true"/"false".
 
         Similar to:
             - Pandas: df[df['col'] == value]
@@ -87,13 +185,17 @@ class XMLQueryBuilder:
         Example:
             query = XMLQueryBuilder("account").add_filter("name", "eq", "Contoso")
         """
-        if not self.filters:
-            self.filter_root = ET.SubElement(self.entity, "filter", {"type": "and"})
-            self.filters.append(self.filter_root)
-        ET.SubElement(self.filter_root, "condition", {
+        if type(value) is not str:
+            if type(value) is bool:
+                value = _BOOLSTR[value]
+            else:
+                value = str(value)
+        if self._filter_root is None:
+            self._filter_root = _SubElement(self.entity, "filter", {"type": "and"})
+        _SubElement(self._filter_root, "condition", {
             "attribute": attribute,
             "operator": operator,
-            "value": str(value)
+            "value": value
         })
         return self
 
@@ -112,11 +214,10 @@ class XMLQueryBuilder:
         Example:
             query = XMLQueryBuilder("account").add_order("name", descending=True)
         """
-        order = ET.SubElement(self.entity, "order", {
+        _SubElement(self.entity, "order", {
             "attribute": attribute,
             "descending": "true" if descending else "false"
         })
-        self.orders.append(order)
         return self
 
     def add_aggregate(self, attribute, alias, aggregate_type):
@@ -135,12 +236,11 @@ class XMLQueryBuilder:
         Example:
             query = XMLQueryBuilder("account").add_aggregate("revenue", "total_revenue", "sum")
         """
-        aggregate = ET.SubElement(self.entity, "attribute", {
+        _SubElement(self.entity, "attribute", {
             "name": attribute,
             "alias": alias,
             "aggregate": aggregate_type
         })
-        self.aggregates.append(aggregate)
         return self
 
     def add_group_by(self, *attributes):
@@ -157,11 +257,10 @@ class XMLQueryBuilder:
         Example:
             query = XMLQueryBuilder("account").add_group_by("industry")
         """
-        for attr in attributes:
-            ET.SubElement(self.entity, "attribute", {
-                "name": attr,
-                "groupby": "true"
-            })
+        self.entity.extend([_Element("attribute", {
+            "name": attr,
+            "groupby": "true"
+        }) for attr in attributes])
         return self
 
     def add_fetch_xml(self, fetch_xml_string):
@@ -182,15 +281,26 @@ class XMLQueryBuilder:
             '''
             query = XMLQueryBuilder("account").add_fetch_xml(fetch_xml_string)
         """
-        fetch_xml_root = ET.fromstring(fetch_xml_string)
+        fetch_xml_root = _fromstring(fetch_xml_string)
         self.root = fetch_xml_root
-        self.entity = fetch_xml_root.find(".//entity")
+        self.entity = fetch_xml_root.find("entity")
         return self
 
+    def _output_root(self, pretty):
+        """Return the tree to serialize: the live root, or an indented copy of it when pretty."""
+        if not pretty:
+            return self.root
+        root = deepcopy(self.root)
+        _indent(root, space="  ")
+        return root
+
     def to_string(self, pretty=False):
         """
         Convert the query to a FetchXML string.
 
+        Pretty output is cached and reused for as long as the compact
+        serialization of the tree stays the same.
+
         Args:
             pretty (bool, optional): Whether to pretty-print the XML string.
 
@@ -200,11 +310,48 @@ class XMLQueryBuilder:
         Example:
             query_string = XMLQueryBuilder("account").select("name", "accountid").to_string(pretty=True)
         """
-        xml_str = ET.tostring(self.root, encoding='unicode')
-        if pretty:
-            dom = xml.dom.minidom.parseString(xml_str)
-            xml_str = dom.toprettyxml()
-        return xml_str
+        xml_str = _tostring(self.root, encoding='unicode')
+        if not pretty:
+            return xml_str
+        cache = self._cache
+        if cache is not None and cache[0] == xml_str:
+            return cache[1]
+        pretty_str = _tostring(self._output_root(True), encoding='unicode')
+        self._cache = (xml_str, pretty_str)
+        return pretty_str
+
+    def to_bytes(self, pretty=False):
+        """
+        Convert the query to UTF-8 encoded FetchXML bytes.
+
+        Args:
+            pretty (bool, optional): Whether to pretty-print the XML.
+
+        Returns:
+            bytes: The UTF-8 encoded FetchXML, without an XML declaration.
+
+        Example:
+            query_bytes = XMLQueryBuilder("account").select("name", "accountid").to_bytes()
+        """
+        return _tostring(self._output_root(pretty), encoding='utf-8')
+
+    def write_to(self, fp, pretty=False):
+        """
+        Write the query as UTF-8 encoded FetchXML to a binary file object.
+
+        The XML is streamed to fp as it is serialized, so the compact output is
+        never held in memory as one string. With pretty=True the tree is first
+        copied so it can be indented, which needs memory for a second full tree.
+
+        Args:
+            fp (file): A file object opened in binary mode, e.g. a file, BytesIO or sys.stdout.buffer.
+            pretty (bool, optional): Whether to pretty-print the XML.
+
+        Example:
+            with open("query.xml", "wb") as fp:
+                XMLQueryBuilder("account").select("name", "accountid").write_to(fp, pretty=True)
+        """
+        ET.ElementTree(self._output_root(pretty)).write(fp, encoding='utf-8', xml_declaration=True)
 
     @classmethod
     def from_fetch_xml(cls, fetch_xml_string):
@@ -228,11 +375,9 @@ class XMLQueryBuilder:
             '''
             query_builder = XMLQueryBuilder.from_fetch_xml(fetch_xml_string)
         """
-        fetch_xml_root = ET.fromstring(fetch_xml_string)
-        entity_name = fetch_xml_root.find(".//entity").attrib["name"]
-        query_builder = cls(entity_name)
-        query_builder.add_fetch_xml(fetch_xml_string)
-        return query_builder
+        fetch_xml_root = _fromstring(fetch_xml_string)
+        entity_name = fetch_xml_root.find("entity").attrib["name"]
+        return cls(entity_name, root=fetch_xml_root)
 
 
 def main():
@@ -268,7 +413,14 @@ def main():
     '''
 
     query_builder = XMLQueryBuilder.from_fetch_xml(fetch_xml_string)
-    print(query_builder.to_string(pretty=True))
+    # Text-only streams (e.g. io.StringIO or some IDE consoles) have no binary buffer.
+    buffer = getattr(sys.stdout, "buffer", None)
+    if buffer is None:
+        print(query_builder.to_string(pretty=True))
+    else:
+        sys.stdout.flush()
+        query_builder.write_to(buffer, pretty=True)
+        buffer.write(b"\n")
 
 if __name__ == "__main__":
     main()